@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 class BaseAdapter(ABC):
     @abstractmethod
@@ -19,6 +19,25 @@ class BaseAdapter(ABC):
     def update_metadata(self, catalog: str, schema: str, model_name: str, sql_hash: str, materialized: str, execution_id: int) -> None:
         pass
 
+    def update_metadata_many(self, catalog: str, schema: str, rows: List[Tuple[str, str, str, int]]) -> None:
+        """Records (model_name, sql_hash, materialized, execution_id) rows. Adapters should batch this where possible."""
+        for model_name, sql_hash, materialized, execution_id in rows:
+            self.update_metadata(catalog, schema, model_name, sql_hash, materialized, execution_id)
+
     @abstractmethod
     def get_next_execution_id(self, catalog: str, schema: str) -> int:
         pass
+
+    def get_relation_types(self, catalog: str, schema: str) -> Optional[Dict[str, str]]:
+        """Returns lowercased relation name -> type (e.g. 'VIEW') for the schema, or None if unknown."""
+        return None
+
+    def close(self) -> None:
+        """Releases any open connections. Adapters without connections need not override."""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
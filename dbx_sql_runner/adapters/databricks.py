@@ -1,13 +1,27 @@
-from typing import Dict, Any, List
+import contextlib
+import logging
+import threading
+import importlib.util
+from typing import Dict, Any, List, Optional, Tuple
 from databricks import sql
-from databricks.sql.exc import RequestError, Error
+from databricks.sql.exc import RequestError, Error, InterfaceError, OperationalError
 from .base import BaseAdapter
 from ..exceptions import DbxConfigurationError, DbxAuthenticationError, DbxExecutionError
 
+logger = logging.getLogger(__name__)
+
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+_METADATA_COLUMNS = ("model_name", "sql_hash", "materialized", "execution_id", "max_execution_id")
+
 class DatabricksAdapter(BaseAdapter):
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self._ensure_connection_params()
+        # One long-lived session per thread; opening a session costs a full handshake.
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._next_execution_ids = {}
 
     def _ensure_connection_params(self):
         # Validate config contains required keys
@@ -16,79 +30,191 @@ class DatabricksAdapter(BaseAdapter):
             if req not in self.config:
                 raise DbxConfigurationError(f"Databricks config missing required key: {req}")
 
-    def execute(self, sql_statement: str) -> None:
+    def _get_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sql.connect(**self.config)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _get_cursor(self):
+        # Cursors are reused for every statement on the thread; they close with their connection
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._get_connection().cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    def _discard_thread_session(self):
+        # After a connection-level failure the session may be dead (expired token, dropped network);
+        # forget it so the next statement on this thread opens a fresh one
+        conn = getattr(self._local, "conn", None)
+        cursor = getattr(self._local, "cursor", None)
+        self._local.conn = None
+        self._local.cursor = None
+        if conn is not None:
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+        for handle in (cursor, conn):
+            if handle is not None:
+                try:
+                    handle.close()
+                except Exception:
+                    pass
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        # Threads holding a closed connection will reconnect on next use
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def _translate_errors(self, action: str):
+        # Maps connector failures to this package's exceptions for every statement entry point
         try:
-            with sql.connect(**self.config) as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(sql_statement)
+            yield
         except RequestError as e:
+            self._discard_thread_session()
             # Often auth related
             raise DbxAuthenticationError(
                 f"Failed to authenticate with Databricks: {e}. "
                 "Please check your 'access_token', 'server_hostname', and 'http_path' in profiles.yml."
             ) from e
-        except Error as e:
+        except (OperationalError, InterfaceError) as e:
+            self._discard_thread_session()
             raise DbxExecutionError(f"Databricks SQL Error: {e}") from e
-        except Exception as e:
-             raise DbxExecutionError(f"Unexpected error executing SQL: {e}") from e
-
-    def fetch_result(self, sql_statement: str) -> List[Any]:
-        try:
-            with sql.connect(**self.config) as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(sql_statement)
-                    return cursor.fetchall()
-        except RequestError as e:
-            raise DbxAuthenticationError(
-                f"Failed to authenticate with Databricks: {e}. "
-                "Please check your 'access_token', 'server_hostname', and 'http_path' in profiles.yml."
-            ) from e
         except Error as e:
+            # Statement-level failure (bad SQL, missing table): the session is still usable
             raise DbxExecutionError(f"Databricks SQL Error: {e}") from e
         except Exception as e:
-             raise DbxExecutionError(f"Unexpected error fetching results: {e}") from e
+             raise DbxExecutionError(f"Unexpected error {action}: {e}") from e
 
+    def execute(self, sql_statement: str, parameters: Optional[List[Any]] = None) -> None:
+        with self._translate_errors("executing SQL"):
+            self._get_cursor().execute(sql_statement, parameters)
+
+    def fetch_result(self, sql_statement: str, parameters: Optional[List[Any]] = None) -> List[Any]:
+        with self._translate_errors("fetching results"):
+            cursor = self._get_cursor()
+            cursor.execute(sql_statement, parameters)
+            return cursor.fetchall()
+
+    def fetch_arrow(self, sql_statement: str, parameters: Optional[List[Any]] = None):
+        """
+        Runs a query and returns the result as a pyarrow.Table.
+
+        Uses the connector's Arrow transport, which avoids building a Python object per row.
+        Requires pyarrow (installed with databricks-sql-connector[pyarrow]).
+        """
+        with self._translate_errors("fetching results"):
+            cursor = self._get_cursor()
+            cursor.execute(sql_statement, parameters)
+            return cursor.fetchall_arrow()
 
     def get_metadata(self, catalog: str, schema: str) -> Dict[str, Any]:
+        # A value left by an earlier read that get_next_execution_id never consumed is stale now
+        self._next_execution_ids.pop((catalog, schema), None)
         self._ensure_metadata_table(catalog, schema)
         meta = {}
         try:
-             # Logic from old core.py
-            rows = self.fetch_result(
-                f"SELECT model_name, sql_hash, materialized, execution_id FROM {catalog}.{schema}._dbx_model_metadata ORDER BY last_executed_at ASC"
+            # The window column lets get_next_execution_id reuse this round-trip
+            query = (
+                "SELECT model_name, sql_hash, materialized, execution_id, MAX(execution_id) OVER () AS max_execution_id "
+                "FROM IDENTIFIER(?) "
+                # Tables written before MERGE was used hold one row per run; keep only the latest per model
+                "QUALIFY row_number() OVER (PARTITION BY model_name ORDER BY last_executed_at DESC) = 1"
             )
+            parameters = [self._metadata_table(catalog, schema)]
+            if _HAS_PYARROW:
+                # Column-wise via Arrow instead of one Row object per model
+                columns = self.fetch_arrow(query, parameters).to_pydict()
+                rows = zip(*(columns[name] for name in _METADATA_COLUMNS))
+            else:
+                rows = self.fetch_result(query, parameters)
+
+            max_execution_id = None
             for row in rows:
-                meta[row.model_name] = {  # Row objects in databricks-sql usually accessible by attribute or index?
-                    # databricks-sql connector returns Row objects which are tuple-like but also named.
-                    # Safest is index for now based on query order.
+                # Index by query order; works for both Row objects and Arrow tuples
+                meta[row[0]] = {
                     "sql_hash": row[1],
                     "materialized": row[2],
-                    "execution_id": row[3] if len(row) > 3 else None
+                    "execution_id": row[3]
                 }
-        except Exception:
-            # print(f"Metadata read error (ignoring): {e}") 
-            pass
+                max_execution_id = row[4]
+            self._next_execution_ids[(catalog, schema)] = self._next_id_from(max_execution_id)
+        except Exception as e:
+            # Carry on with empty metadata, but make it visible: every model rebuilds and execution ids restart
+            logger.warning(f"Could not read model metadata from {self._metadata_table(catalog, schema)}: {e}")
         return meta
 
     def update_metadata(self, catalog: str, schema: str, model_name: str, sql_hash: str, materialized: str, execution_id: int) -> None:
-        sql = f"""
-            INSERT INTO {catalog}.{schema}._dbx_model_metadata 
-            VALUES ('{model_name}', '{sql_hash}', '{materialized}', current_timestamp(), {execution_id})
-        """
-        self.execute(sql)
+        self.update_metadata_many(catalog, schema, [(model_name, sql_hash, materialized, execution_id)])
+
+    def update_metadata_many(self, catalog: str, schema: str, rows: List[Tuple[str, str, str, int]]) -> None:
+        if not rows:
+            return
+        # One MERGE with bound values: a single round-trip, and one row per model instead of one per run
+        values = ", ".join(["(?, ?, ?, ?)"] * len(rows))
+        parameters = [self._metadata_table(catalog, schema)] + [value for row in rows for value in row]
+        self.execute(
+            f"""
+            MERGE INTO IDENTIFIER(?) AS t
+            USING (VALUES {values}) AS s(model_name, sql_hash, materialized, execution_id)
+            ON t.model_name = s.model_name
+            WHEN MATCHED THEN UPDATE SET
+                sql_hash = s.sql_hash,
+                materialized = s.materialized,
+                last_executed_at = current_timestamp(),
+                execution_id = s.execution_id
+            WHEN NOT MATCHED THEN INSERT (model_name, sql_hash, materialized, last_executed_at, execution_id)
+                VALUES (s.model_name, s.sql_hash, s.materialized, current_timestamp(), s.execution_id)
+            """,
+            parameters
+        )
 
     def get_next_execution_id(self, catalog: str, schema: str) -> int:
+        # Already known if get_metadata was just called for this schema
+        cached = self._next_execution_ids.pop((catalog, schema), None)
+        if cached is not None:
+            return cached
         try:
-            rows = self.fetch_result(f"SELECT MAX(execution_id) FROM {catalog}.{schema}._dbx_model_metadata")
-            if rows and rows[0][0] is not None:
-                try:
-                    return int(rows[0][0]) + 1
-                except ValueError:
-                    return 1
-            return 1
+            rows = self.fetch_result("SELECT MAX(execution_id) FROM IDENTIFIER(?)", [self._metadata_table(catalog, schema)])
+            return self._next_id_from(rows[0][0] if rows else None)
         except Exception:
             return 1
 
+    @staticmethod
+    def _metadata_table(catalog: str, schema: str) -> str:
+        # Bound through IDENTIFIER(?) so the statement text is the same for every schema
+        return f"{catalog}.{schema}._dbx_model_metadata"
+
+    @staticmethod
+    def _next_id_from(max_execution_id) -> int:
+        if max_execution_id is None:
+            return 1
+        try:
+            return int(max_execution_id) + 1
+        except ValueError:
+            return 1
+
+    def get_relation_types(self, catalog: str, schema: str) -> Optional[Dict[str, str]]:
+        try:
+            rows = self.fetch_result(
+                f"SELECT table_name, table_type FROM {catalog}.information_schema.tables WHERE lower(table_schema) = lower(?)",
+                [schema]
+            )
+        except Exception:
+            return None
+        return {row[0].lower(): row[1] for row in rows}
+
     def _ensure_metadata_table(self, catalog: str, schema: str):
         create_sql = f"""
             CREATE TABLE IF NOT EXISTS {catalog}.{schema}._dbx_model_metadata (
@@ -101,8 +227,22 @@ class DatabricksAdapter(BaseAdapter):
         """
         self.execute(create_sql)
         
-        # Schema evolution (dumb)
+        # Schema evolution: only tables created before execution_id existed need the column.
+        # Look it up first; the ALTER fails server-side whenever the column is already there.
+        if not self._has_execution_id_column(catalog, schema):
+            try:
+                self.execute(f"ALTER TABLE {catalog}.{schema}._dbx_model_metadata ADD COLUMNS (execution_id BIGINT)")
+            except Exception:
+                pass
+
+    def _has_execution_id_column(self, catalog: str, schema: str) -> bool:
         try:
-            self.execute(f"ALTER TABLE {catalog}.{schema}._dbx_model_metadata ADD COLUMNS (execution_id BIGINT)")
+            rows = self.fetch_result(
+                f"SELECT 1 FROM {catalog}.information_schema.columns "
+                "WHERE lower(table_schema) = lower(?) AND table_name = '_dbx_model_metadata' AND column_name = 'execution_id'",
+                [schema]
+            )
         except Exception:
-            pass
+            # Unknown: fall back to attempting the ALTER
+            return False
+        return bool(rows)
@@ -1,31 +1,47 @@
 import yaml
 import os
+import copy
+import functools
 from .runner import DbxRunner
 from .project import ProjectLoader
 from .adapters.databricks import DatabricksAdapter
 
-def load_config_from_yaml(path):
-    with open(path, 'r') as f:
-        content = f.read()
-    
-    # Expand environment variables ${VAR}
-    expanded_content = os.path.expandvars(content)
-    raw = yaml.safe_load(expanded_content)
+# Prefer the libyaml C bindings when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+# In-process only: the expanded text carries secrets such as ${DBX_ACCESS_TOKEN}, so it is never written to disk
+@functools.lru_cache(maxsize=8)
+def _resolve_profile(path, content):
+    raw = yaml.load(content, Loader=YamlLoader)
     
     # helper to resolve profile
     if "target" in raw and "outputs" in raw:
         target = raw["target"]
-        outputs = raw.get("outputs", {})
+        outputs = raw["outputs"]
         if target not in outputs:
              raise ValueError(f"Target environment '{target}' not found in 'outputs'")
         return outputs[target]
     return raw
 
-def run_project(models_dir, config_path, preview=False):
+def load_config_from_yaml(path):
+    with open(path, 'r') as f:
+        content = f.read()
+    
+    # Expand environment variables ${VAR}
+    expanded_content = os.path.expandvars(content)
+    # Resolved once per distinct (path, content) in this process; callers get their own copy to mutate
+    return copy.deepcopy(_resolve_profile(os.path.abspath(path), expanded_content))
+
+def run_project(models_dir, config_path, preview=False, threads=None):
     config = load_config_from_yaml(config_path)
+    if threads is not None:
+        config["threads"] = threads
     
     loader = ProjectLoader(models_dir)
-    adapter = DatabricksAdapter(config)
-    runner = DbxRunner(loader, adapter, config)
-    
-    runner.run(preview=preview)
+    # Hold a single Databricks session for the whole run and release it at the end
+    with DatabricksAdapter(config) as adapter:
+        runner = DbxRunner(loader, adapter, config)
+        runner.run(preview=preview)
@@ -0,0 +1,48 @@
+import os
+import pickle
+import hashlib
+import logging
+import tempfile
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+def get_cache_dir() -> str:
+    """
+    Returns the directory used for dbx-sql-runner caches.
+
+    Honours DBX_SQL_RUNNER_CACHE_DIR, then XDG_CACHE_HOME, then ~/.cache.
+    """
+    override = os.environ.get("DBX_SQL_RUNNER_CACHE_DIR")
+    if override:
+        return override
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "dbx_sql_runner")
+
+def cache_path(namespace: str, key: str, suffix: str = ".pkl") -> str:
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(get_cache_dir(), namespace, digest + suffix)
+
+def read_pickle(path: str) -> Optional[Any]:
+    # A missing or corrupt cache is never an error; callers just rebuild it
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+def write_pickle(path: str, data: Any) -> None:
+    """Atomically writes `data` to `path` (owner-readable only). Failures are ignored."""
+    try:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    except Exception as e:
+        logger.debug(f"Could not write cache file {path}: {e}")
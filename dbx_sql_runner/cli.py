@@ -20,6 +20,7 @@ def main():
     run_parser = subparsers.add_parser("run", help="Run the models against the database")
     run_parser.add_argument("--models-dir", default="models", help="Directory containing SQL models")
     run_parser.add_argument("--profile", required=False, default="profiles.yml", help="Path to YAML configuration file (default: profiles.yml)")
+    run_parser.add_argument("--threads", type=int, default=None, help="Number of models to build concurrently (default: 'threads' from profile, or 1)")
 
     # Build command (Preview)
     build_parser = subparsers.add_parser("build", help="Preview the models that will be built")
@@ -38,7 +39,7 @@ def main():
     
     try:
         if args.command == "run":
-            run_project(args.models_dir, args.profile)
+            run_project(args.models_dir, args.profile, threads=args.threads)
         elif args.command == "build":
             # For build, we want to show the plan, so we pass preview=True to run_project
             # We need to update api.py/run_project to accept this or access DbxRunnerProject directly.
@@ -13,3 +13,7 @@ class DbxAuthenticationError(DbxRunnerError):
 class DbxExecutionError(DbxRunnerError):
     """Raised when a SQL execution fails."""
     pass
+
+class DbxDependencyError(DbxRunnerError, ValueError):
+    """Raised when model dependencies cannot be ordered (e.g. a cycle)."""
+    pass
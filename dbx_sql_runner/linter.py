@@ -1,16 +1,26 @@
 import os
 import re
 import logging
+import copy
+import functools
+import itertools
 import yaml
-import sqlglot
-from sqlglot import exp
 from typing import Dict, Any
 from .project import ProjectLoader
 
-from .api import load_config_from_yaml
+from .api import load_config_from_yaml, YamlLoader
 
 logger = logging.getLogger(__name__)
 
+_PLACEHOLDER_RE = re.compile(r"\{.*?\}")
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_sql(sql: str):
+    # sqlglot is only needed for linting, so keep it off the import path of `run`
+    import sqlglot
+    return sqlglot.parse_one(sql)
+
 DEFAULT_CONFIG = {
     "model_name": {
         "pattern": "^[a-z0-9_]+$",
@@ -35,12 +45,12 @@ class ProjectLinter:
         self.errors = []
 
     def _load_config(self) -> Dict[str, Any]:
-        config = DEFAULT_CONFIG.copy()
+        config = copy.deepcopy(DEFAULT_CONFIG)
         if os.path.exists(self.config_file):
             logger.info(f"Loading linter config from {self.config_file}")
             try:
                 with open(self.config_file, 'r') as f:
-                    user_config = yaml.safe_load(f) or {}
+                    user_config = yaml.load(f, Loader=YamlLoader) or {}
                 
                 # Merge user config into default config
                 if "rules" in user_config:
@@ -49,6 +59,11 @@ class ProjectLinter:
                             config[rule_name].update(rule_def)
             except Exception as e:
                 logger.warning(f"Warning: Failed to load config file: {e}")
+
+        # Compile each rule once instead of going through re's cache on every check
+        for rule in config.values():
+            pattern = rule.get("pattern")
+            rule["_re"] = re.compile(pattern) if pattern else None
         return config
 
     def lint_project(self) -> bool:
@@ -72,10 +87,21 @@ class ProjectLinter:
         if not rule:
             return
 
-        pattern = rule.get("pattern")
-        if pattern and not re.match(pattern, value):
-            message = rule.get("message", f"Must match pattern {pattern}")
-            self.errors.append(f"[{rule_name}] {context}: '{value}' - {message}")
+        regex = rule.get("_re")
+        if regex is not None and not regex.match(value):
+            self._report(rule_name, rule, value, context)
+
+    def _check_patterns(self, values, rule_name: str, context: str):
+        rule = self.config.get(rule_name)
+        if not rule or rule.get("_re") is None:
+            return
+
+        for value in itertools.filterfalse(rule["_re"].match, values):
+            self._report(rule_name, rule, value, context)
+
+    def _report(self, rule_name: str, rule: Dict[str, Any], value: str, context: str):
+        message = rule.get("message", f"Must match pattern {rule.get('pattern')}")
+        self.errors.append(f"[{rule_name}] {context}: '{value}' - {message}")
 
     def check_models(self):
         try:
@@ -92,6 +118,8 @@ class ProjectLinter:
             self._check_model_columns(model)
 
     def _check_model_columns(self, model):
+        from sqlglot import exp
+
         try:
             # Transpile to Databricks/Spark dialect to handle specific syntax if needed
             # For now, generic parsing should work for most SELECTs
@@ -99,17 +127,15 @@ class ProjectLinter:
             
             # Simple heuristic replacement for parsing
             # This might fail on complex jinja-like usage, but good for basic {ref}
-            clean_sql = re.sub(r"\{.*?\}", "dummy_table", model.sql)
+            clean_sql = _PLACEHOLDER_RE.sub("dummy_table", model.sql)
             
-            expression = sqlglot.parse_one(clean_sql)
+            expression = _parse_sql(clean_sql)
             
             # We are interested in the final projection
             # This is a best-effort check.
             if isinstance(expression, exp.Select):
-                for projection in expression.selects:
-                    col_name = projection.alias_or_name
-                    if col_name != "*":
-                        self._check_pattern(col_name, "column_name", f"Model '{model.name}' Column")
+                columns = [p.alias_or_name for p in expression.selects if p.alias_or_name != "*"]
+                self._check_patterns(columns, "column_name", f"Model '{model.name}' Column")
             
         except Exception as e:
             # Don't fail the whole lint run if one file can't be parsed
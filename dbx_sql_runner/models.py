@@ -1,7 +1,15 @@
+import re
+import sys
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 
-@dataclass
+# {name} references in model SQL: upstream models, sources and {this}
+PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+# __slots__ drops the per-instance __dict__; dataclass(slots=...) needs Python 3.10+
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Model:
     name: str
     materialized: str
@@ -10,3 +18,8 @@ class Model:
     partition_by: List[str] = field(default_factory=list)
     execution_result: Optional[str] = None # 'EXECUTE', 'SKIP', 'FAIL'
     sql_hash: Optional[str] = None
+    # Names referenced as {name} in sql, scanned once so rendering only looks these up
+    placeholders: FrozenSet[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.placeholders = frozenset(PLACEHOLDER_RE.findall(self.sql))
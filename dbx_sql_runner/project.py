@@ -1,50 +1,97 @@
 import os
 import re
-import networkx as nx
-from typing import List
-from .models import Model
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+from .models import Model, PLACEHOLDER_RE
+from .cache import cache_path, read_pickle, write_pickle
+from .exceptions import DbxDependencyError
+
+# Bump when Model or the parsing rules change so stale cached models are discarded
+_MODEL_CACHE_VERSION = 4
+
+# [ \t] rather than \s: under MULTILINE, \s would let a bare "--" line pair with the key on the next line
+_META_RE = re.compile(r"^--[ \t]*(name|materialized|depends_on|partition_by)[ \t]*:(.*)$", re.MULTILINE)
+_COMMENT_LINE_RE = re.compile(r"^--.*\n?", re.MULTILINE)
+
+def _parse_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+_META_PARSERS = {
+    "name": str.strip,
+    "materialized": str.strip,
+    "depends_on": _parse_list,
+    "partition_by": _parse_list,
+}
 
 class ProjectLoader:
     def __init__(self, models_dir: str):
         self.models_dir = models_dir
+        # path -> ((mtime_ns, size), Model) from the last load; None until the disk cache is read
+        self._files = None
+
+    def invalidate(self):
+        """Forgets cached models so the next load_models() re-parses every file."""
+        self._files = {}
 
     def load_models(self) -> List[Model]:
-        models = []
-        if not os.path.exists(self.models_dir):
+        # One directory scan; DirEntry carries the name and path without extra syscalls
+        try:
+            with os.scandir(self.models_dir) as it:
+                entries = [e for e in it if e.name.endswith(".sql") and e.is_file()]
+        except FileNotFoundError:
             raise ValueError(f"Models directory not found: {self.models_dir}")
             
-        for f in os.listdir(self.models_dir):
-            if f.endswith(".sql"):
-                models.append(self._parse_model_file(os.path.join(self.models_dir, f)))
-        return models
+        # Sorted so model order does not depend on filesystem listing order
+        entries.sort(key=lambda e: e.path)
+
+        # Reuse models parsed on a previous load (in memory) or run (on disk) when the file is unchanged
+        cache_file = cache_path("models", os.path.abspath(self.models_dir))
+        if self._files is None:
+            cached = read_pickle(cache_file)
+            if not isinstance(cached, dict) or cached.get("version") != _MODEL_CACHE_VERSION:
+                cached = {"files": {}}
+            self._files = cached["files"]
+
+        files = {}
+        stale = []
+        for entry in entries:
+            st = entry.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+            hit = self._files.get(entry.path)
+            if hit and hit[0] == stamp:
+                files[entry.path] = hit
+            else:
+                stale.append((entry.path, stamp))
+
+        parsed = self._parse_model_files([path for path, _ in stale])
+        for (path, stamp), model in zip(stale, parsed):
+            files[path] = (stamp, model)
+
+        if stale or len(files) != len(self._files):
+            write_pickle(cache_file, {"version": _MODEL_CACHE_VERSION, "files": files})
+        self._files = files
+        return [files[e.path][1] for e in entries]
+
+    def _parse_model_files(self, paths: List[str]) -> List[Model]:
+        # Parsing is dominated by open/read latency, so threads overlap it well
+        if len(paths) <= 1:
+            return [self._parse_model_file(p) for p in paths]
+        workers = min(32, (os.cpu_count() or 1) * 4, len(paths))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._parse_model_file, paths))
 
     def _parse_model_file(self, path: str) -> Model:
-        with open(path, 'r') as f:
-            lines = f.readlines()
+        text = Path(path).read_text(encoding='utf-8')
         meta = {"depends_on": [], "partition_by": []}
-        sql_lines = []
-        for line in lines:
-            if line.startswith("--"):
-                if "name:" in line:
-                    meta["name"] = line.split("name:")[1].strip()
-                elif "materialized:" in line:
-                    meta["materialized"] = line.split("materialized:")[1].strip()
-                elif "depends_on:" in line:
-                    deps = line.split("depends_on:")[1].strip()
-                    meta["depends_on"] = [d.strip() for d in deps.split(",") if d.strip()]
-                elif "partition_by:" in line:
-                    parts = line.split("partition_by:")[1].strip()
-                    meta["partition_by"] = [p.strip() for p in parts.split(",") if p.strip()]
-            else:
-                sql_lines.append(line)
+        for key, value in _META_RE.findall(text):
+            meta[key] = _META_PARSERS[key](value)
         
-        sql_body = ''.join(sql_lines)
+        # Comment lines are metadata, everything else is the model body
+        sql_body = _COMMENT_LINE_RE.sub("", text)
         
-        # Inference: Find all {variable} patterns and add them as dependencies
-        inferred_deps = re.findall(r"\{(\w+)\}", sql_body)
-        for dep in inferred_deps:
-            if dep not in meta["depends_on"]:
-                meta["depends_on"].append(dep)
+        # Inference: Find all {variable} patterns and add them as dependencies (order-preserving dedup)
+        meta["depends_on"] = list(dict.fromkeys(meta["depends_on"] + PLACEHOLDER_RE.findall(sql_body)))
 
         return Model(
             name=meta.get("name", os.path.basename(path).replace(".sql", "")),
@@ -57,24 +104,89 @@ class ProjectLoader:
 class DependencyGraph:
     def __init__(self, models: List[Model]):
         self.models = models
-        self.dag = self._build_dag()
+        self.by_name = {m.name: m for m in models}
+        self._succ, self._indeg = self._build_dag()
 
-    def _build_dag(self) -> nx.DiGraph:
-        dag = nx.DiGraph()
-        model_map = {m.name: m for m in self.models}
+    def _build_dag(self) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+        # Plain adjacency lists + in-degree counts; enough for Kahn's algorithm
+        succ = {m.name: [] for m in self.models}
+        indeg = {m.name: 0 for m in self.models}
         
         for m in self.models:
-            dag.add_node(m.name, model=m)
-            for dep in m.depends_on:
-                if dep in model_map:
-                    dag.add_edge(dep, m.name)
-        return dag
+            for dep in dict.fromkeys(m.depends_on):
+                if dep in succ:
+                    succ[dep].append(m.name)
+                    indeg[m.name] += 1
+        return succ, indeg
 
-    def get_execution_order(self) -> List[Model]:
-        try:
-            sorted_names = list(nx.topological_sort(self.dag))
-        except nx.NetworkXUnfeasible:
-            raise ValueError("Cyclic dependency detected in models")
+    def _topological_layers(self) -> List[List[str]]:
+        indeg = dict(self._indeg)
+        layer = [name for name, degree in indeg.items() if degree == 0]
+        layers = []
+        visited = 0
         
-        model_map = {m.name: m for m in self.models}
-        return [model_map[name] for name in sorted_names]
+        while layer:
+            layers.append(layer)
+            visited += len(layer)
+            next_layer = []
+            for name in layer:
+                for child in self._succ[name]:
+                    indeg[child] -= 1
+                    if indeg[child] == 0:
+                        next_layer.append(child)
+            layer = next_layer
+
+        # Nodes left with unresolved in-degree are part of (or behind) a cycle
+        if visited < len(indeg):
+            cycles = "; ".join(", ".join(scc) for scc in self._find_cycles())
+            raise DbxDependencyError(f"Cyclic dependency detected in models: {cycles}")
+        return layers
+
+    def _find_cycles(self) -> List[List[str]]:
+        """Returns the strongly connected components that form cycles (iterative Tarjan)."""
+        index, lowlink = {}, {}
+        stack, on_stack = [], set()
+        cycles = []
+
+        for root in self._succ:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self._succ[root]))]
+
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self._succ[child])))
+                        break
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        scc = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            scc.append(member)
+                            if member == node:
+                                break
+                        if len(scc) > 1 or node in self._succ[node]:
+                            cycles.append(sorted(scc))
+        return cycles
+
+    def get_execution_order(self) -> List[Model]:
+        return [self.by_name[name] for layer in self._topological_layers() for name in layer]
+
+    def get_execution_layers(self) -> List[List[Model]]:
+        """Groups models into layers; models in the same layer do not depend on each other."""
+        return [[self.by_name[name] for name in layer] for layer in self._topological_layers()]
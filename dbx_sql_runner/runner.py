@@ -1,15 +1,53 @@
+import functools
 import hashlib
 import re
-from typing import Dict, Any, List
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, List, Mapping
 import time
 import logging
-from .models import Model
+from concurrent.futures import ThreadPoolExecutor
+from .models import Model, PLACEHOLDER_RE
 from .adapters.base import BaseAdapter
 from .project import ProjectLoader, DependencyGraph
 
     
 logger = logging.getLogger(__name__)
 
+# DDL per materialization; filled with the target FQN, partition clause and rendered SQL
+_DDL_TEMPLATES = {
+    'view': "CREATE OR REPLACE VIEW {fqn} AS {sql}",
+    'table': "CREATE OR REPLACE TABLE {fqn}{partition} AS {sql}",
+    'ddl': "{sql}",
+}
+
+_TEMPLATE_TOKEN_RE = re.compile(r"\{(\w+)\}|[{}]")
+
+class _RenderContext(dict):
+    """Render context that leaves unknown placeholders (e.g. {external_table}) untouched."""
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+def _escape_token(match):
+    name = match.group(1)
+    if name is not None and not name.isdigit():
+        return match.group(0)
+    # Literal braces, and numeric fields str.format would treat as positional
+    return match.group(0).replace("{", "{{").replace("}", "}}")
+
+def _fingerprint(text: str) -> str:
+    # Change detection only, not integrity; BLAKE2b is faster than SHA-256 and gives the same hex length
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=32).hexdigest()
+
+@functools.lru_cache(maxsize=1024)
+def _compile_template(sql_body: str) -> str:
+    """Escapes every brace that is not a {name} placeholder so the body is safe for str.format_map."""
+    return _TEMPLATE_TOKEN_RE.sub(_escape_token, sql_body)
+
+@functools.lru_cache(maxsize=1024)
+def _placeholders(sql_body: str) -> FrozenSet[str]:
+    """Placeholder names for SQL that did not come from a Model (which scans its own at parse time)."""
+    return frozenset(PLACEHOLDER_RE.findall(sql_body))
+
 class DbxRunner:
     def __init__(self, project_loader: ProjectLoader, adapter: BaseAdapter, config: Dict[str, Any]):
         self.loader = project_loader
@@ -18,6 +56,8 @@ class DbxRunner:
         self.catalog = config.get('catalog')
         self.schema = config.get('schema')
         self.sources = config.get('sources', {})
+        # A bare 'threads:' in profiles.yml loads as None
+        self.threads = max(1, int(config.get('threads') or 1))
         # Staging schema removed; using suffixes instead
 
     def run(self, preview=False):
@@ -44,36 +84,54 @@ class DbxRunner:
         # This allows {source_name} to be resolved to their configured FQN
         context_map.update(self.sources)
 
-        model_map = {m.name: m for m in models}
+        # Listed once per run: decides whether unchanged views still exist and which DROP a target needs
+        relations = self.adapter.get_relation_types(self.catalog, self.schema)
+        if not relations and all_meta:
+            # Metadata says models were built here, so an empty listing is not trustworthy
+            # (e.g. a schema name the catalog does not match); fall back to the unknown-listing paths
+            relations = None
+
+        # Target context is the same for every model, so build it once
+        target_context = {name: f"{self.catalog}.{self.schema}.{name}" for name in graph.by_name}
+        # Add sources to target context as well
+        target_context.update(self.sources)
 
         # Need to iterate in sorted order to build context map
         for model in sorted_models:
-             # Calculate generic hash (using target context)
-            target_context = {m: f"{self.catalog}.{self.schema}.{model_map[m].name}" for m in model_map}
-            # Add sources to target context as well
-            target_context.update(self.sources)
-            
-            current_sql_content = self._render_sql(model.sql, target_context)
-            current_hash = hashlib.sha256(current_sql_content.encode('utf-8')).hexdigest()
+            # Calculate generic hash (using target context); the rendered text is reused to promote views
+            current_sql_content = self._render_sql(model.sql, target_context, model.placeholders)
+            current_hash = _fingerprint(current_sql_content)
             
             last_hash = all_meta.get(model.name, {}).get("sql_hash")
             
             action = "EXECUTE"
             if model.materialized == 'view' and last_hash == current_hash:
                 action = "SKIP"
+                # Unchanged SQL is only safe to skip if the view was not dropped out-of-band.
+                if relations is not None and model.name.lower() not in relations:
+                    action = "EXECUTE"
             
+            # Built once here and carried on the plan item through build, promote and cleanup
+            fqn_target = f"{self.catalog}.{self.schema}.{model.name}"
+            fqn_staging = f"{fqn_target}__staging"
+
             execution_plan.append({
                 "name": model.name,
                 "action": action,
                 "model": model,
-                "hash": current_hash
+                "fqn_target": fqn_target,
+                "fqn_staging": fqn_staging,
+                "hash": current_hash,
+                "rendered_target_sql": current_sql_content,
+                # What the target currently is ("" if absent, None if unknown). A model with metadata but no
+                # listing entry keeps the guessing DROP rather than skipping it.
+                "relation_type": self._relation_type(relations, model.name, model.name in all_meta),
+                # What the target was last built as; the DROP hint when the relation type is unknown
+                "previous_materialized": all_meta.get(model.name, {}).get("materialized")
             })
             
-            if action == "EXECUTE":
-                # Staging FQN: suffix with __staging
-                context_map[model.name] = f"{self.catalog}.{self.schema}.{model.name}__staging"
-            else:
-                context_map[model.name] = f"{self.catalog}.{self.schema}.{model.name}"
+            # Downstream models read from staging when this one is rebuilt, from the target otherwise
+            context_map[model.name] = fqn_staging if action == "EXECUTE" else fqn_target
 
         # Print Plan
         if not self.config.get('silent'):
@@ -81,124 +139,169 @@ class DbxRunner:
             for item in execution_plan:
                 logger.info(f" - {item['name']}: {item['action']}")
 
+        # Fast path: nothing changed, so no staging, promotion or cleanup round-trips
+        if not any(item['action'] == "EXECUTE" for item in execution_plan):
+            logger.info(f"Nothing to build. SKIP={len(execution_plan)}")
+            return
+
         if preview:
             return
 
+        # A single pool is kept for the whole run so each worker reuses its adapter session
+        executor = ThreadPoolExecutor(max_workers=self.threads) if self.threads > 1 else None
+        try:
+            # Read-only from here on: shared by every worker thread without copies
+            self._execute_plan(graph, execution_plan, MappingProxyType(context_map), execution_id, executor)
+        finally:
+            if executor:
+                executor.shutdown()
+
+    def _execute_plan(self, graph: DependencyGraph, execution_plan: List[Dict], context_map: Mapping[str, str], execution_id: int, executor):
         # Execute
         results = {"PASS": 0, "WARN": 0, "ERROR": 0, "SKIP": 0}
         model_status = {} # model_name -> status
+        # Filtered once; both phases and cleanup only look at models that are being built
+        todo = {item['name']: item for item in execution_plan if item['action'] == "EXECUTE"}
         
-        total_models = len([i for i in execution_plan if i['action'] == "EXECUTE"])
+        total_models = len(todo)
         current_idx = 0
-        
-        for item in execution_plan:
-            model = item['model']
-            
-            if item['action'] == "SKIP":
-                model_status[model.name] = "SKIP"
-                results["SKIP"] += 1
-                continue
-            
-            # Check Upstream Dependencies
-            upstream_failed = False
-            for dep in model.depends_on:
-                if dep in model_status and model_status[dep] in ["ERROR", "SKIP_UPSTREAM"]:
-                    upstream_failed = True
-                    break
-            
-            if upstream_failed:
-                model_status[model.name] = "SKIP_UPSTREAM"
-                logger.info(f"Skipping {model.name} due to upstream failure")
-                results["SKIP"] += 1
-                continue
-
-            current_idx += 1
-            self._log_start(current_idx, total_models, model)
-            start_time = time.time()
-            
-            try:
-                # Pass suffix-based FQN directly or let execute handle it?
-                # _execute_model logic needs update to handle FQN construction
-                staging_fqn = f"{self.catalog}.{self.schema}.{model.name}__staging"
-                self._execute_model(model, context_map, staging_fqn)
-                
-                duration = time.time() - start_time
-                self._log_end(current_idx, total_models, model, duration)
-                model_status[model.name] = "SUCCESS"
-                results["PASS"] += 1
-                
-            except Exception as e:
-                logger.error(f"Error executing {model.name}: {e}")
-                model_status[model.name] = "ERROR"
-                results["ERROR"] += 1
+
+        def build(entry):
+            idx, item = entry
+            return self._build_model(idx, total_models, item, context_map)
+
+        layers = graph.get_execution_layers()
+
+        # Models within a layer are independent, so they can be built concurrently
+        for layer in layers:
+            to_build = []
+            for model in layer:
+                if model.name not in todo:
+                    model_status[model.name] = "SKIP"
+                    results["SKIP"] += 1
+                    continue
+
+                # Check Upstream Dependencies
+                upstream_failed = False
+                for dep in model.depends_on:
+                    if dep in model_status and model_status[dep] in ["ERROR", "SKIP_UPSTREAM"]:
+                        upstream_failed = True
+                        break
+
+                if upstream_failed:
+                    model_status[model.name] = "SKIP_UPSTREAM"
+                    logger.info(f"Skipping {model.name} due to upstream failure")
+                    results["SKIP"] += 1
+                    continue
+
+                current_idx += 1
+                to_build.append((current_idx, todo[model.name]))
+
+            if executor and len(to_build) > 1:
+                statuses = list(executor.map(build, to_build))
+            else:
+                statuses = [build(entry) for entry in to_build]
+
+            for (_, item), status in zip(to_build, statuses):
+                model_status[item['name']] = status
+                results["PASS" if status == "SUCCESS" else "ERROR"] += 1
             
         # Promote / Atomic Swap
         # print("Promoting models...") 
-        for item in execution_plan:
+        def promote(item):
             model = item['model']
-            
+            try:
+                self._promote_model(item)
+                return (model.name, item['hash'], model.materialized, execution_id)
+            except Exception as e:
+                logger.error(f"Error promoting {model.name}: {e}")
+                return None
+
+        # Layer by layer, so target views are only re-created once their upstreams are in place
+        metadata_rows = []
+        for layer in layers:
             # Only promote if SUCCESS (skip SKIPPED, ERROR, and originally SKIP)
-            if model_status.get(model.name) != "SUCCESS":
-                continue
+            to_promote = [todo[m.name] for m in layer if model_status.get(m.name) == "SUCCESS"]
+
+            if executor and len(to_promote) > 1:
+                rows = list(executor.map(promote, to_promote))
+            else:
+                rows = [promote(item) for item in to_promote]
+
+            for row in rows:
+                if row is None:
+                    results["ERROR"] += 1 # Should we count promotion error as error? Yes.
+                    # Adjust PASS count? Technically it executed but didn't promote.
+                    # Let's just increment ERROR.
+                else:
+                    metadata_rows.append(row)
 
+        # Record all promoted models in a single metadata write
+        if metadata_rows:
             try:
-                self._promote_model(model)
-                self.adapter.update_metadata(self.catalog, self.schema, model.name, item['hash'], model.materialized, execution_id)
+                self.adapter.update_metadata_many(self.catalog, self.schema, metadata_rows)
             except Exception as e:
-                logger.error(f"Error promoting {model.name}: {e}")
-                results["ERROR"] += 1 # Should we count promotion error as error? Yes.
-                # Adjust PASS count? Technically it executed but didn't promote.
-                # Let's just increment ERROR.
+                # Models are promoted already; missing metadata only means they rebuild next run
+                logger.error(f"Error updating model metadata: {e}")
 
         # Cleanup
-        self._cleanup_staging(execution_plan)
+        self._cleanup_staging(list(todo.values()), executor)
         logger.info(f"Done. PASS={results['PASS']} WARN={results['WARN']} ERROR={results['ERROR']} SKIP={results['SKIP']} TOTAL={results['PASS']+results['ERROR']+results['SKIP']}")
 
-    def _log_start(self, idx, total, model):
+    def _build_model(self, idx, total, item, context_map) -> str:
+        model = item['model']
+        self._log_start(idx, total, model, item['fqn_target'])
+        start_time = time.time()
+
+        try:
+            self._execute_model(model, context_map, item['fqn_staging'])
+
+            duration = time.time() - start_time
+            self._log_end(idx, total, model, item['fqn_target'], duration)
+            return "SUCCESS"
+
+        except Exception as e:
+            logger.error(f"Error executing {model.name}: {e}")
+            return "ERROR"
+
+    def _log_start(self, idx, total, model, fqn):
         # Timestamp handled by logging formatter
-        logger.info(f"{idx} of {total} START sql {model.materialized} model {self.catalog}.{self.schema}.{model.name} ... [RUN]")
+        logger.info(f"{idx} of {total} START sql {model.materialized} model {fqn} ... [RUN]")
 
-    def _log_end(self, idx, total, model, duration):
-        logger.info(f"{idx} of {total} OK created {model.materialized} model {self.catalog}.{self.schema}.{model.name} ... [OK in {duration:.2f}s]")
+    def _log_end(self, idx, total, model, fqn, duration):
+        logger.info(f"{idx} of {total} OK created {model.materialized} model {fqn} ... [OK in {duration:.2f}s]")
 
-    def _execute_model(self, model: Model, context: Dict[str, str], fqn: str):
+    def _execute_model(self, model: Model, context: Mapping[str, str], fqn: str):
         # Inject {this} to point to the current FQN (staging or target)
-        local_context = context.copy()
-        local_context["this"] = fqn
-        
-        rendered_sql = self._render_sql(model.sql, local_context)
+        rendered_sql = model.sql
+        if model.placeholders:
+            # Only copy the context for models that reference something
+            local_context = dict(context)
+            local_context["this"] = fqn
+            rendered_sql = self._render_sql(model.sql, local_context, model.placeholders)
         
-        partition_clause = ""
-        if model.partition_by:
-            cols = ", ".join(model.partition_by)
-            partition_clause = f"PARTITIONED BY ({cols})"
+        # Carries its own leading space so unpartitioned tables get no double space
+        partition_clause = " PARTITIONED BY (" + ", ".join(model.partition_by) + ")" if model.partition_by else ""
 
-        if model.materialized == 'view':
-             ddl = f"CREATE OR REPLACE VIEW {fqn} AS {rendered_sql}"
-        elif model.materialized == 'table':
-             ddl = f"CREATE OR REPLACE TABLE {fqn} {partition_clause} AS {rendered_sql}"
-        elif model.materialized == 'ddl':
-             ddl = rendered_sql
-        else:
-             ddl = f"CREATE OR REPLACE VIEW {fqn} AS {rendered_sql}"
+        # Unknown materializations fall back to a view
+        template = _DDL_TEMPLATES.get(model.materialized, _DDL_TEMPLATES['view'])
+        ddl = template.format(fqn=fqn, partition=partition_clause, sql=rendered_sql)
         
         self.adapter.execute(ddl)
 
-    def _promote_model(self, model: Model):
-        fqn_target = f"{self.catalog}.{self.schema}.{model.name}"
-        fqn_staging = f"{self.catalog}.{self.schema}.{model.name}__staging"
+    def _promote_model(self, item: Dict[str, Any]):
+        model = item['model']
+        fqn_target = item['fqn_target']
+        fqn_staging = item['fqn_staging']
         
         # Helper to drop target before swap (idempotency)
-        self._safe_drop_target(fqn_target)
+        self._safe_drop_target(fqn_target, item.get('previous_materialized'), item.get('relation_type'))
 
         if model.materialized == 'view':
              # For views, we simply re-create them in the Target schema.
-             # We MUST re-render the SQL using the Target schema context so the view definition points to production tables.
-             # TODO: Optimize context loading
-             target_context = {m.name: f"{self.catalog}.{self.schema}.{m.name}" for m in self.loader.load_models()}
-             
-             final_sql = self._render_sql(model.sql, target_context)
-             self.adapter.execute(f"CREATE OR REPLACE VIEW {fqn_target} AS {final_sql}")
+             # The view definition must point to production tables, i.e. the SQL rendered with the Target schema context.
+             # Planning already rendered exactly that to hash it.
+             self.adapter.execute(_DDL_TEMPLATES['view'].format(fqn=fqn_target, sql=item['rendered_target_sql']))
              
         elif model.materialized == 'table':
             # Atomic Swap (Rename)
@@ -210,23 +313,51 @@ class DbxRunner:
               except Exception as e:
                   logger.warning(f"Warning: Could not rename DDL artifact {fqn_staging}. Error: {e}")
 
-    def _cleanup_staging(self, execution_plan: List[Dict]):
-        # print("Cleaning up...") # staging artifacts...")
-        for item in execution_plan:
-            # We cleanup everything, skipped or not (though skipped won't exist usually)
-            # Actually only need to cleanup things we executed.
-            if item['action'] == "EXECUTE":
-                fqn_staging = f"{self.catalog}.{self.schema}.{item['name']}__staging"
-                self._safe_drop_target(fqn_staging)
+    def _cleanup_staging(self, executed: List[Dict], executor=None):
+        # Only need to cleanup things we executed (skipped won't exist usually)
+        # Staging objects were created this run with the model's materialization, so use it as the DROP hint
+        fqns = [item['fqn_staging'] for item in executed]
+        kinds = [item['model'].materialized for item in executed]
+
+        # The DROPs are independent of each other, so dispatch them concurrently when possible
+        if executor and len(fqns) > 1:
+            list(executor.map(self._safe_drop_target, fqns, kinds))
+        else:
+            for fqn, kind in zip(fqns, kinds):
+                self._safe_drop_target(fqn, kind)
+
+    @staticmethod
+    def _relation_type(relations, name: str, has_metadata: bool):
+        if relations is None:
+            return None
+        relation_type = relations.get(name.lower())
+        if relation_type is None:
+            return None if has_metadata else ""
+        return relation_type
+
+    def _safe_drop_target(self, fqn: str, materialized: str = None, relation_type: str = None):
+        if relation_type is not None:
+            # Known from information_schema: one DROP of the right kind, or none if it does not exist
+            if relation_type:
+                self.adapter.execute(f"DROP {'VIEW' if relation_type.upper() == 'VIEW' else 'TABLE'} IF EXISTS {fqn}")
+            return
 
-    def _safe_drop_target(self, fqn: str):
+        # Otherwise try the likely kind first; the other DROP only runs if that guess was wrong
+        first, second = ("VIEW", "TABLE") if materialized == 'view' else ("TABLE", "VIEW")
         try:
-             self.adapter.execute(f"DROP TABLE IF EXISTS {fqn}")
+             self.adapter.execute(f"DROP {first} IF EXISTS {fqn}")
         except Exception:
-             self.adapter.execute(f"DROP VIEW IF EXISTS {fqn}")
+             self.adapter.execute(f"DROP {second} IF EXISTS {fqn}")
 
-    def _render_sql(self, sql_body, context):
-        def replace(match):
-            key = match.group(1)
-            return context.get(key, match.group(0))
-        return re.sub(r"\{(\w+)\}", replace, sql_body)
+    def _render_sql(self, sql_body, context, placeholders=None):
+        if placeholders is None:
+            # No brace at all: nothing to scan for (and no need to hash the body into the lru_cache)
+            if "{" not in sql_body:
+                return sql_body
+            placeholders = _placeholders(sql_body)
+        if not placeholders:
+            # Nothing to substitute, and literal braces render as themselves
+            return sql_body
+        # Look up only the names the body references rather than wrapping the whole context on every render
+        values = _RenderContext({name: context[name] for name in placeholders if name in context})
+        return _compile_template(sql_body).format_map(values)
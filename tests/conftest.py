@@ -0,0 +1,6 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    # Keep on-disk caches out of the user's home directory during tests
+    monkeypatch.setenv("DBX_SQL_RUNNER_CACHE_DIR", str(tmp_path / "dbx_cache"))
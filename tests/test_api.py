@@ -49,6 +49,29 @@ class TestAPI(unittest.TestCase):
         config = load_config_from_yaml(path)
         self.assertEqual(config["token"], "my_secret_token")
     
+    def test_load_config_cached(self):
+        data = {"catalog": "c", "schema": "s"}
+        path = self.create_yaml("cached.yml", data)
+        load_config_from_yaml(path)
+
+        # Second load of an unchanged file must not re-parse the YAML
+        with patch("dbx_sql_runner.api.yaml.load") as mock_load:
+            config = load_config_from_yaml(path)
+            mock_load.assert_not_called()
+        self.assertEqual(config["catalog"], "c")
+
+        # Editing the file invalidates the cache
+        self.create_yaml("cached.yml", {"catalog": "c2"})
+        config = load_config_from_yaml(path)
+        self.assertEqual(config["catalog"], "c2")
+
+    def test_load_config_returns_independent_copies(self):
+        path = self.create_yaml("copy.yml", {"catalog": "c"})
+        config = load_config_from_yaml(path)
+        config["threads"] = 8
+
+        self.assertNotIn("threads", load_config_from_yaml(path))
+
     def test_load_config_missing_target(self):
         data = {
             "target": "prod",
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 import sys
 import os
 
@@ -8,7 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from dbx_sql_runner.adapters.databricks import DatabricksAdapter
 from dbx_sql_runner.exceptions import DbxConfigurationError, DbxAuthenticationError, DbxExecutionError
-from databricks.sql.exc import RequestError, Error
+from databricks.sql.exc import RequestError, Error, OperationalError, ServerOperationError
 
 class TestErrorHandling(unittest.TestCase):
     def setUp(self):
@@ -50,5 +50,45 @@ class TestErrorHandling(unittest.TestCase):
             
         self.assertIn("Databricks SQL Error", str(cm.exception))
 
+    @patch("dbx_sql_runner.adapters.databricks.sql.connect")
+    def test_fetch_errors_wrapped_like_execute(self, mock_connect):
+        mock_connect.side_effect = RequestError("Auth Failed")
+
+        adapter = DatabricksAdapter(self.config)
+
+        for fetch in (adapter.fetch_result, adapter.fetch_arrow):
+            with self.assertRaises(DbxAuthenticationError):
+                fetch("SELECT 1")
+
+    @patch("dbx_sql_runner.adapters.databricks.sql.connect")
+    def test_reconnect_after_connection_error(self, mock_connect):
+        dead_conn, fresh_conn = MagicMock(), MagicMock()
+        mock_connect.side_effect = [dead_conn, fresh_conn]
+        dead_conn.cursor.return_value.execute.side_effect = OperationalError("Session expired")
+
+        adapter = DatabricksAdapter(self.config)
+
+        with self.assertRaises(DbxExecutionError):
+            adapter.execute("SELECT 1")
+        dead_conn.close.assert_called_once()
+
+        # The next statement on this thread opens a new session instead of reusing the dead one
+        adapter.execute("SELECT 2")
+        fresh_conn.cursor.return_value.execute.assert_called_once_with("SELECT 2", None)
+        self.assertEqual(adapter._connections, [fresh_conn])
+
+    @patch("dbx_sql_runner.adapters.databricks.sql.connect")
+    def test_statement_error_keeps_session(self, mock_connect):
+        cursor = mock_connect.return_value.cursor.return_value
+        cursor.execute.side_effect = [ServerOperationError("Table not found"), None]
+
+        adapter = DatabricksAdapter(self.config)
+
+        with self.assertRaises(DbxExecutionError):
+            adapter.execute("SELECT * FROM missing")
+        adapter.execute("SELECT 1")
+
+        self.assertEqual(mock_connect.call_count, 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -99,3 +99,27 @@ def test_lint_custom_config(project_layout):
     linter = ProjectLinter(temp_dir, config_file="lint.yml")
     linter.lint_project()
     assert len(linter.errors) > 0
+
+def test_lint_reuses_parse_for_identical_sql(project_layout):
+    from dbx_sql_runner.linter import _parse_sql
+    temp_dir, create_model, _, _ = project_layout
+    create_model("first_model", "SELECT 1 as id, 2 as other_id")
+    create_model("second_model", "SELECT 1 as id, 2 as other_id")
+
+    _parse_sql.cache_clear()
+    linter = ProjectLinter(temp_dir)
+    linter.lint_project()
+
+    assert len(linter.errors) == 0
+    assert _parse_sql.cache_info().hits == 1
+
+def test_lint_reports_each_bad_column(project_layout):
+    temp_dir, create_model, _, _ = project_layout
+    create_model("valid_model", "SELECT 1 as id, 2 as CamelOne, 3 as CamelTwo")
+
+    linter = ProjectLinter(temp_dir)
+    linter.lint_project()
+
+    assert len(linter.errors) == 2
+    assert "'CamelOne'" in linter.errors[0]
+    assert "'CamelTwo'" in linter.errors[1]
@@ -22,8 +22,8 @@ class TestMetadataUpdate(unittest.TestCase):
         
         self.mock_conn = MagicMock()
         self.mock_cursor = MagicMock()
-        self.mock_connect.return_value.__enter__.return_value = self.mock_conn
-        self.mock_conn.cursor.return_value.__enter__.return_value = self.mock_cursor
+        self.mock_connect.return_value = self.mock_conn
+        self.mock_conn.cursor.return_value = self.mock_cursor
         
         self.adapter = DatabricksAdapter(self.config)
 
@@ -31,6 +31,7 @@ class TestMetadataUpdate(unittest.TestCase):
         self.connect_patcher.stop()
             
     def test_ensure_metadata_table(self):
+        self.mock_cursor.fetchall.return_value = []  # execution_id not in information_schema
         self.adapter._ensure_metadata_table('cat', 'sch')
         
         # Verify CREATE TABLE has execution_id BIGINT
@@ -46,16 +47,44 @@ class TestMetadataUpdate(unittest.TestCase):
         self.assertTrue(alter_call, "ALTER TABLE not called")
         self.assertIn("ADD COLUMNS (execution_id BIGINT)", alter_call[0], "Incorrect ALTER TABLE statement")
 
+    def test_schema_evolution_skipped_when_column_exists(self):
+        self.mock_cursor.fetchall.return_value = [(1,)]
+        self.adapter._ensure_metadata_table('cat', 'sch')
+
+        calls = [c[0][0] for c in self.mock_cursor.execute.call_args_list]
+        self.assertTrue([c for c in calls if "information_schema.columns" in c])
+        self.assertFalse([c for c in calls if "ALTER TABLE" in c])
+
+    def test_schema_evolution_attempted_when_lookup_fails(self):
+        def fail_lookup(sql, parameters=None):
+            if "information_schema" in sql:
+                raise Exception("TABLE_OR_VIEW_NOT_FOUND")
+        self.mock_cursor.execute.side_effect = fail_lookup
+        self.adapter._ensure_metadata_table('cat', 'sch')
+
+        calls = [c[0][0] for c in self.mock_cursor.execute.call_args_list]
+        self.assertTrue([c for c in calls if "ALTER TABLE" in c])
+
     def test_update_metadata(self):
         execution_id = 123
         self.adapter.update_metadata('cat', 'sch', 'my_model', 'hash123', 'view', execution_id)
         
-        # Verify INSERT includes integer execution_id
-        calls = [c[0][0] for c in self.mock_cursor.execute.call_args_list]
-        insert_call = [c for c in calls if "INSERT INTO" in c]
-        self.assertTrue(insert_call, "INSERT INTO not called")
-        sql = insert_call[0]
-        self.assertIn(f", {execution_id})", sql, "execution_id value missing or quoted in INSERT")
+        # Verify MERGE binds values (execution_id stays an integer)
+        merge_calls = [c for c in self.mock_cursor.execute.call_args_list if "MERGE INTO" in c[0][0]]
+        self.assertTrue(merge_calls, "MERGE INTO not called")
+        sql, params = merge_calls[0][0]
+        self.assertIn("USING (VALUES (?, ?, ?, ?))", sql)
+        self.assertIn("ON t.model_name = s.model_name", sql)
+        self.assertEqual(params, ['cat.sch._dbx_model_metadata', 'my_model', 'hash123', 'view', execution_id])
+
+    def test_update_metadata_many_single_statement(self):
+        rows = [('m1', 'h1', 'view', 7), ('m2', 'h2', 'table', 7)]
+        self.adapter.update_metadata_many('cat', 'sch', rows)
+
+        self.assertEqual(self.mock_cursor.execute.call_count, 1)
+        sql, params = self.mock_cursor.execute.call_args[0]
+        self.assertEqual(sql.count("(?, ?, ?, ?)"), 2)
+        self.assertEqual(params, ['cat.sch._dbx_model_metadata', 'm1', 'h1', 'view', 7, 'm2', 'h2', 'table', 7])
 
     def test_get_metadata_read(self):
         # Simply skip verifying the return structure detail for now, verify Call
@@ -63,10 +92,83 @@ class TestMetadataUpdate(unittest.TestCase):
         self.adapter.get_metadata('cat', 'sch')
         
         calls = [c[0][0] for c in self.mock_cursor.execute.call_args_list]
-        select_call = [c for c in calls if "SELECT" in c]
+        select_call = [c for c in calls if "SELECT" in c and "information_schema" not in c]
         self.assertTrue(select_call)
         self.assertIn("execution_id", select_call[0])
-        self.assertIn("ORDER BY last_executed_at ASC", select_call[0])
+        # Latest row per model only
+        self.assertIn("PARTITION BY model_name ORDER BY last_executed_at DESC", select_call[0])
+
+    @patch('dbx_sql_runner.adapters.databricks._HAS_PYARROW', False)
+    def test_next_execution_id_from_metadata_read(self):
+        self.mock_cursor.fetchall.return_value = [('m1', 'h1', 'view', 4, 4)]
+
+        meta = self.adapter.get_metadata('cat', 'sch')
+        self.assertEqual(meta['m1']['sql_hash'], 'h1')
+
+        # No extra round-trip: the id comes from the metadata query
+        calls_before = self.mock_cursor.execute.call_count
+        self.assertEqual(self.adapter.get_next_execution_id('cat', 'sch'), 5)
+        self.assertEqual(self.mock_cursor.execute.call_count, calls_before)
+
+    @patch('dbx_sql_runner.adapters.databricks._HAS_PYARROW', False)
+    def test_failed_metadata_read_discards_previous_next_id(self):
+        self.adapter._ensure_metadata_table = MagicMock()
+        self.mock_cursor.fetchall.return_value = [('m1', 'h1', 'view', 4, 4)]
+        self.adapter.get_metadata('cat', 'sch')  # no matching get_next_execution_id
+
+        # A later read fails; the id from the first read must not be reused
+        self.mock_cursor.fetchall.side_effect = [Exception("read failed"), [(9,)]]
+        with self.assertLogs('dbx_sql_runner.adapters.databricks', level='WARNING'):
+            self.adapter.get_metadata('cat', 'sch')
+        self.assertEqual(self.adapter.get_next_execution_id('cat', 'sch'), 10)
+
+    @patch('dbx_sql_runner.adapters.databricks._HAS_PYARROW', False)
+    def test_get_metadata_read_failure_is_logged(self):
+        def fail_on_select(sql, parameters=None):
+            if sql.startswith("SELECT"):
+                raise Exception("IDENTIFIER not supported")
+        self.mock_cursor.execute.side_effect = fail_on_select
+
+        with self.assertLogs('dbx_sql_runner.adapters.databricks', level='WARNING') as logs:
+            meta = self.adapter.get_metadata('cat', 'sch')
+
+        self.assertEqual(meta, {})
+        self.assertIn("IDENTIFIER not supported", logs.output[0])
+
+    @patch('dbx_sql_runner.adapters.databricks._HAS_PYARROW', True)
+    def test_get_metadata_arrow(self):
+        self.mock_cursor.fetchall_arrow.return_value.to_pydict.return_value = {
+            "model_name": ["m1", "m2"],
+            "sql_hash": ["h1", "h2"],
+            "materialized": ["view", "table"],
+            "execution_id": [3, 4],
+            "max_execution_id": [4, 4],
+        }
+        # Only the metadata read itself goes through the result fetch under test
+        self.adapter._ensure_metadata_table = MagicMock()
+
+        meta = self.adapter.get_metadata('cat', 'sch')
+
+        self.mock_cursor.fetchall.assert_not_called()
+        self.assertEqual(meta['m2'], {"sql_hash": "h2", "materialized": "table", "execution_id": 4})
+        self.assertEqual(self.adapter.get_next_execution_id('cat', 'sch'), 5)
+
+    def test_relation_types_match_schema_case_insensitively(self):
+        self.mock_cursor.fetchall.return_value = [("My_View", "VIEW")]
+
+        relations = self.adapter.get_relation_types('cat', 'Mixed_Schema')
+
+        self.assertEqual(relations, {"my_view": "VIEW"})
+        sql, params = self.mock_cursor.execute.call_args[0]
+        self.assertIn("lower(table_schema) = lower(?)", sql)
+        self.assertEqual(params, ['Mixed_Schema'])
+
+    def test_fetch_arrow(self):
+        table = MagicMock()
+        self.mock_cursor.fetchall_arrow.return_value = table
+
+        self.assertIs(self.adapter.fetch_arrow("SELECT 1"), table)
+        self.mock_cursor.fetchall.assert_not_called()
 
     def test_get_next_execution_id(self):
         # Case 1: Empty table
@@ -78,5 +180,22 @@ class TestMetadataUpdate(unittest.TestCase):
         self.mock_cursor.fetchall.return_value = [(10,)]
         self.assertEqual(self.adapter.get_next_execution_id('cat', 'sch'), 11)
 
+    def test_connection_reused_across_statements(self):
+        self.adapter.execute("SELECT 1")
+        self.adapter.fetch_result("SELECT 2")
+        self.adapter.get_metadata('cat', 'sch')
+
+        self.assertEqual(self.mock_connect.call_count, 1)
+        self.assertEqual(self.mock_conn.cursor.call_count, 1)
+
+    def test_close_releases_connection(self):
+        with self.adapter as adapter:
+            adapter.execute("SELECT 1")
+        self.mock_conn.close.assert_called_once()
+
+        # A closed adapter reconnects lazily on next use
+        self.adapter.execute("SELECT 1")
+        self.assertEqual(self.mock_connect.call_count, 2)
+
 if __name__ == '__main__':
     unittest.main()
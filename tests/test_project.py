@@ -3,12 +3,14 @@ import os
 import tempfile
 import shutil
 import sys
+from unittest.mock import patch
 
 # Add parent dir to path to import dbx_sql_runner
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from dbx_sql_runner.project import ProjectLoader, DependencyGraph
 from dbx_sql_runner.models import Model
+from dbx_sql_runner.exceptions import DbxDependencyError
 
 class TestProjectLoader(unittest.TestCase):
     def setUp(self):
@@ -43,6 +45,65 @@ SELECT * FROM {source_a} JOIN {source_b}
         self.assertEqual(m.partition_by, ["date", "region"])
         self.assertIn("source_a", m.depends_on)
         self.assertIn("source_b", m.depends_on)
+        self.assertEqual(m.sql, "SELECT * FROM {source_a} JOIN {source_b}\n")
+
+    def test_metadata_key_must_share_the_comment_line(self):
+        # A bare "--" line followed by "key: value" SQL is not metadata
+        self.create_file("plain.sql", "--\nname: oops\nSELECT 1")
+        self.create_file("spaced.sql", "--   \n  depends_on: x\nSELECT 2")
+        models = {m.name: m for m in ProjectLoader(self.test_dir).load_models()}
+
+        self.assertEqual(set(models), {"plain", "spaced"})
+        self.assertEqual(models["spaced"].depends_on, [])
+
+    def test_load_many_models_sorted(self):
+        for name in ["c_model", "a_model", "b_model"]:
+            self.create_file(f"{name}.sql", "SELECT 1")
+        self.create_file("notes.txt", "not a model")
+
+        models = ProjectLoader(self.test_dir).load_models()
+        self.assertEqual([m.name for m in models], ["a_model", "b_model", "c_model"])
+
+    def test_unchanged_models_loaded_from_cache(self):
+        self.create_file("a_model.sql", "SELECT 1")
+        self.create_file("b_model.sql", "SELECT 2")
+        ProjectLoader(self.test_dir).load_models()
+
+        # Nothing changed: no file is parsed again
+        loader = ProjectLoader(self.test_dir)
+        with patch.object(loader, "_parse_model_file", wraps=loader._parse_model_file) as mock_parse:
+            models = loader.load_models()
+            mock_parse.assert_not_called()
+        self.assertEqual([m.sql for m in models], ["SELECT 1", "SELECT 2"])
+
+        # Only the edited file is re-parsed
+        self.create_file("b_model.sql", "SELECT 22")
+        with patch.object(loader, "_parse_model_file", wraps=loader._parse_model_file) as mock_parse:
+            models = loader.load_models()
+            self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual([m.sql for m in models], ["SELECT 1", "SELECT 22"])
+
+    def test_repeat_load_served_from_memory(self):
+        self.create_file("a_model.sql", "SELECT 1")
+        loader = ProjectLoader(self.test_dir)
+        first = loader.load_models()
+
+        with patch("dbx_sql_runner.project.read_pickle") as mock_read:
+            second = loader.load_models()
+            mock_read.assert_not_called()
+        self.assertIs(first[0], second[0])
+
+        loader.invalidate()
+        with patch.object(loader, "_parse_model_file", wraps=loader._parse_model_file) as mock_parse:
+            loader.load_models()
+            self.assertEqual(mock_parse.call_count, 1)
+
+    def test_placeholders_survive_cache(self):
+        self.create_file("joined.sql", "SELECT * FROM {a} JOIN {b} ON '{}' = {a}.id")
+        ProjectLoader(self.test_dir).load_models()
+
+        model = ProjectLoader(self.test_dir).load_models()[0]
+        self.assertEqual(model.placeholders, frozenset({"a", "b"}))
 
     def test_variable_inference(self):
         content = "SELECT * FROM {inferred_table}"
@@ -72,6 +133,38 @@ class TestDependencyGraph(unittest.TestCase):
         with self.assertRaises(ValueError) as cm:
             graph.get_execution_order()
         self.assertIn("Cyclic dependency", str(cm.exception))
+        self.assertIsInstance(cm.exception, DbxDependencyError)
+
+    def test_cycle_error_names_cycle_members(self):
+        models = [
+            Model("root", "view", "", [], []),
+            Model("a", "view", "", ["root", "c"], []),
+            Model("b", "view", "", ["a"], []),
+            Model("c", "view", "", ["b"], []),
+            Model("downstream", "view", "", ["c"], []),
+            Model("loop", "view", "", ["loop"], []),
+        ]
+        with self.assertRaises(DbxDependencyError) as cm:
+            DependencyGraph(models).get_execution_order()
+        # Only the models on a cycle are listed, not ones merely blocked behind it
+        self.assertIn("a, b, c", str(cm.exception))
+        self.assertIn("loop", str(cm.exception))
+        self.assertNotIn("downstream", str(cm.exception))
+        self.assertNotIn("root", str(cm.exception))
+
+    def test_self_dependency_is_cycle(self):
+        graph = DependencyGraph([Model("a", "view", "", ["a"], [])])
+        with self.assertRaises(ValueError):
+            graph.get_execution_order()
+
+    def test_execution_layers(self):
+        m1 = Model("a", "view", "", [], [])
+        m2 = Model("b", "view", "", [], [])
+        m3 = Model("c", "view", "", ["a", "b"], [])
+
+        graph = DependencyGraph([m1, m2, m3])
+        layers = [sorted(m.name for m in layer) for layer in graph.get_execution_layers()]
+        self.assertEqual(layers, [["a", "b"], ["c"]])
 
     def test_ignore_missing_upstream(self):
         # If A depends on External which is not in project, External should be ignored in internal DAG
@@ -17,6 +17,7 @@ class MockAdapterLogic(MagicMock):
         self.metadata = {}  # model_name -> {sql_hash, materialized}
         self.executed_sql = []
         self.next_id = 99
+        self.relations = None  # None -> adapter cannot list relations
 
     def get_metadata(self, catalog, schema):
         return self.metadata
@@ -26,6 +27,9 @@ class MockAdapterLogic(MagicMock):
 
     def execute(self, sql):
         self.executed_sql.append(sql)
+
+    def get_relation_types(self, catalog, schema):
+        return self.relations
         
     def ensure_schema_exists(self, c, s): pass
     def drop_schema_cascade(self, c, s): pass
@@ -38,6 +42,10 @@ class TestRunnerLogic(unittest.TestCase):
         self.config = {"catalog": "cat", "schema": "sch"}
         self.runner = DbxRunner(self.loader, self.adapter, self.config)
 
+    def test_null_threads_defaults_to_one(self):
+        runner = DbxRunner(self.loader, self.adapter, {**self.config, "threads": None})
+        self.assertEqual(runner.threads, 1)
+
     def test_skip_view_logic(self):
         # Scenario: Model 'my_view' is a VIEW and Hash Matches -> Should be SKIPPED
         sql_content = "SELECT 1"
@@ -47,7 +55,7 @@ class TestRunnerLogic(unittest.TestCase):
         # Manually compute hash runner uses
         # Runner renders with target context: {m: cat.sch.my_view}
         # "SELECT 1" -> "SELECT 1" (no vars)
-        expected_hash = hashlib.sha256(sql_content.encode('utf-8')).hexdigest()
+        expected_hash = hashlib.blake2b(sql_content.encode('utf-8'), digest_size=32).hexdigest()
         
         # Pre-populate metadata with SAME hash
         self.adapter.metadata = {"my_view": {"sql_hash": expected_hash, "materialized": "view"}}
@@ -58,6 +66,83 @@ class TestRunnerLogic(unittest.TestCase):
         # Should NOT see CREATE OR REPLACE ...
         create_calls = [s for s in self.adapter.executed_sql if "CREATE OR REPLACE" in s]
         self.assertEqual(len(create_calls), 0, "View should have been skipped")
+        # Nothing to build: no cleanup DROPs either
+        self.assertEqual(self.adapter.executed_sql, [])
+
+    def test_rebuild_view_missing_from_catalog(self):
+        # Scenario: hash matches but the view was dropped outside the runner -> Should be REBUILT
+        sql_content = "SELECT 1"
+        model = Model("my_view", "view", sql_content, [], [])
+        self.loader.load_models.return_value = [model]
+
+        expected_hash = hashlib.blake2b(sql_content.encode('utf-8'), digest_size=32).hexdigest()
+        self.adapter.metadata = {"my_view": {"sql_hash": expected_hash, "materialized": "view"}}
+        self.adapter.relations = {"other_view": "VIEW"}
+
+        self.runner.run()
+
+        create_calls = [s for s in self.adapter.executed_sql if "CREATE OR REPLACE VIEW" in s]
+        self.assertTrue(create_calls, "Missing view should have been rebuilt")
+
+    def test_promotion_drops_previous_view_directly(self):
+        model = Model("my_view", "view", "SELECT 2", [], [])
+        self.loader.load_models.return_value = [model]
+        self.adapter.metadata = {"my_view": {"sql_hash": "old", "materialized": "view"}}
+
+        self.runner.run()
+
+        # Metadata says the target is a view, so no DROP TABLE attempt is needed first
+        self.assertIn("DROP VIEW IF EXISTS cat.sch.my_view", self.adapter.executed_sql)
+        self.assertNotIn("DROP TABLE IF EXISTS cat.sch.my_view", self.adapter.executed_sql)
+
+    def test_promotion_drop_uses_listed_relation_type(self):
+        self.loader.load_models.return_value = [
+            Model("my_table", "table", "SELECT 1", [], []),
+            Model("new_view", "view", "SELECT 2", [], []),
+        ]
+        # Metadata is stale: the target is a table now, and new_view does not exist yet
+        self.adapter.metadata = {"my_table": {"sql_hash": "old", "materialized": "view"}}
+        self.adapter.relations = {"my_table": "MANAGED"}
+
+        self.runner.run()
+
+        sqls = self.adapter.executed_sql
+        self.assertIn("DROP TABLE IF EXISTS cat.sch.my_table", sqls)
+        self.assertNotIn("DROP VIEW IF EXISTS cat.sch.my_table", sqls)
+        self.assertFalse([s for s in sqls if s.startswith("DROP") and s.endswith("cat.sch.new_view")])
+
+    def test_table_ddl_partition_clause(self):
+        self.loader.load_models.return_value = [
+            Model("plain_tbl", "table", "SELECT 1", [], []),
+            Model("part_tbl", "table", "SELECT 1 AS d, 2 AS r", [], ["d", "r"]),
+        ]
+        self.runner.run()
+
+        sqls = self.adapter.executed_sql
+        self.assertIn("CREATE OR REPLACE TABLE cat.sch.plain_tbl__staging AS SELECT 1", sqls)
+        self.assertIn("CREATE OR REPLACE TABLE cat.sch.part_tbl__staging PARTITIONED BY (d, r) AS SELECT 1 AS d, 2 AS r", sqls)
+
+    def test_empty_listing_with_metadata_falls_back(self):
+        # Scenario: the schema listing comes back empty (e.g. schema-name case mismatch) although
+        # metadata shows both models were built -> keep unchanged views, and still DROP before rename
+        self.loader.load_models.return_value = [
+            Model("my_view", "view", "SELECT 1", [], []),
+            Model("my_table", "table", "SELECT 2", [], []),
+        ]
+        view_hash = hashlib.blake2b(b"SELECT 1", digest_size=32).hexdigest()
+        self.adapter.metadata = {
+            "my_view": {"sql_hash": view_hash, "materialized": "view"},
+            "my_table": {"sql_hash": "old", "materialized": "table"},
+        }
+        self.adapter.relations = {}
+
+        self.runner.run()
+
+        sqls = self.adapter.executed_sql
+        self.assertFalse([s for s in sqls if "my_view" in s], "Unchanged view should be skipped")
+        self.assertIn("DROP TABLE IF EXISTS cat.sch.my_table", sqls)
+        self.assertLess(sqls.index("DROP TABLE IF EXISTS cat.sch.my_table"),
+                        sqls.index("ALTER TABLE cat.sch.my_table__staging RENAME TO cat.sch.my_table"))
 
     def test_execute_table_even_if_hash_matches(self):
         # Scenario: Model 'my_table' is a TABLE and Hash Matches -> Should be REBUILT (Not skipped)
@@ -67,7 +152,7 @@ class TestRunnerLogic(unittest.TestCase):
         model = Model("my_table", "table", sql_content, [], [])
         self.loader.load_models.return_value = [model]
         
-        expected_hash = hashlib.sha256(sql_content.encode('utf-8')).hexdigest()
+        expected_hash = hashlib.blake2b(sql_content.encode('utf-8'), digest_size=32).hexdigest()
         self.adapter.metadata = {"my_table": {"sql_hash": expected_hash, "materialized": "table"}}
         
         self.runner.run()
@@ -138,5 +223,62 @@ class TestRunnerLogic(unittest.TestCase):
         self.assertTrue(create_view_calls)
         self.assertIn("SELECT * FROM prod_catalog.schema.table", create_view_calls[0])
 
+    def test_view_promotion_reuses_planned_render(self):
+        model = Model("view_model", "view", "SELECT * FROM {external_source}", [], [])
+        self.loader.load_models.return_value = [model]
+        self.runner.sources = {"external_source": "prod_catalog.schema.table"}
+
+        self.runner.run()
+
+        # Promotion uses the SQL rendered while planning instead of reloading the project
+        self.assertEqual(self.loader.load_models.call_count, 1)
+        self.assertIn(
+            "CREATE OR REPLACE VIEW cat.sch.view_model AS SELECT * FROM prod_catalog.schema.table",
+            self.adapter.executed_sql,
+        )
+
+    def test_parallel_layers(self):
+        # Scenario: Two independent tables feed a view; built with multiple threads
+        self.loader.load_models.return_value = [
+            Model("left_tbl", "table", "SELECT 1", [], []),
+            Model("right_tbl", "table", "SELECT 2", [], []),
+            Model("joined", "view", "SELECT * FROM {left_tbl} JOIN {right_tbl}", ["left_tbl", "right_tbl"], []),
+        ]
+        self.runner.threads = 4
+
+        self.runner.run()
+
+        sqls = self.adapter.executed_sql
+        builds = [s for s in sqls if "CREATE OR REPLACE" in s and "__staging" in s]
+        self.assertEqual(len(builds), 3)
+        # Downstream view must be built after both of its upstreams
+        self.assertIn("joined__staging", builds[-1])
+        self.assertIn("cat.sch.left_tbl__staging", builds[-1])
+
+        # Promotion also runs per layer: the view is re-created only after both tables are renamed
+        renames = [i for i, s in enumerate(sqls) if s.startswith("ALTER TABLE")]
+        view_promote = sqls.index("CREATE OR REPLACE VIEW cat.sch.joined AS SELECT * FROM cat.sch.left_tbl JOIN cat.sch.right_tbl")
+        self.assertEqual(len(renames), 2)
+        self.assertGreater(view_promote, max(renames))
+
+    def test_render_keeps_literal_braces(self):
+        sql = """SELECT from_json('{"a": 1}', 'a INT'), '{0}', {{upstream}} FROM {upstream} JOIN {unknown}"""
+        rendered = self.runner._render_sql(sql, {"upstream": "cat.sch.upstream"})
+        self.assertEqual(
+            rendered,
+            """SELECT from_json('{"a": 1}', 'a INT'), '{0}', {cat.sch.upstream} FROM cat.sch.upstream JOIN {unknown}"""
+        )
+
+    def test_render_does_not_rescan_substituted_values(self):
+        # A configured value that itself looks like a placeholder is inserted literally
+        context = {"src": "cat.sch.{other}", "other": "cat.sch.other"}
+        sql = "SELECT * FROM {src} JOIN {other}"
+        model = Model("m", "view", sql, [], [])
+        for placeholders in (None, model.placeholders):
+            self.assertEqual(
+                self.runner._render_sql(sql, context, placeholders),
+                "SELECT * FROM cat.sch.{other} JOIN cat.sch.other"
+            )
+
 if __name__ == '__main__':
     unittest.main()